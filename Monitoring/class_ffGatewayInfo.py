@@ -1196,7 +1196,7 @@ class ffGatewayInfo:
 
         for PeerKey in self.__FastdKeyDict:
             PeerDnsName = self.__FastdKeyDict[PeerKey]['DnsName']
-            GitSegment = int(self.__FastdKeyDict[PeerKey]['KeyDir'][3:])
+            GitSegment = self.__FastdKeyDict[PeerKey]['PeerSeg']
 
             if self.__FastdKeyDict[PeerKey]['Dns6Seg'] is None:
                 self.__alert('!! DNSv6 Entry missing: %s -> %s = %s' % (self.__FastdKeyDict[PeerKey]['KeyFile'],self.__FastdKeyDict[PeerKey]['PeerMAC'],self.__FastdKeyDict[PeerKey]['PeerName']))
@@ -44,6 +44,10 @@ import time
 import datetime
 import fcntl
 import re
+import sys
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from class_ffNodeInfo import *
 from class_ffGatewayInfo import *
@@ -57,12 +61,27 @@ from class_ffGatewayInfo import *
 StatFileName   = 'SegStatistics.json'
 
 MaxStatisticsData  = 12 * 24 * 7    # 1 Week with Data all 5 Minutes
+MaxBatctlWorkers   = 16             # parallel batman traceroutes
 
 NODEWEIGHT_OFFLINE     = 1
 NODEWEIGHT_MESH_ONLY   = 3
 NODEWEIGHT_UPLINK      = 1000
 NODEWEIGHT_SEGMENT_FIX = 1000000
 
+NodeWeightOfState = {                           # Weight of Nodes without fixed Segment
+    NODESTATE_ONLINE_VPN:  NODEWEIGHT_UPLINK,
+    NODESTATE_ONLINE_MESH: NODEWEIGHT_MESH_ONLY
+}
+
+SectionSeparator = '\n\n' + '#' * 72 + '\n\n'
+TotalsSeparator  = '\n' + '-' * 72 + '\n'
+CloudSeparator   = '\n' + '-' * 114 + '\n'
+
+NodeLineFormat = '%s%s Seg.%02d [%3d] %s = %7s - %16s = \'%s\' (%s = %s) UpT = %d\n'
+
+BatctlTrHeadTemplate = re.compile(r'^traceroute to \S+ \(([0-9a-f]{2}(?::[0-9a-f]{2}){5})\)')  # -> MAC of Target
+BatctlTrHopTemplate  = re.compile(r'^\s*\d+:\s+([0-9a-f]{2}(?::[0-9a-f]{2}){5})\s+\S')      # -> MAC of Hop
+
 
 
 
@@ -83,6 +102,37 @@ class ffMeshNet:
 
         self.__MeshCloudDict  = {}      # Dictionary of Mesh-Clouds with List of Member-Nodes
         self.__NodeMoveDict   = {}      # Git Moves of Nodes from one Segment to another
+        self.__LogBuffer      = []      # Console Messages of current Phase
+        return
+
+
+
+    #-----------------------------------------------------------------------
+    # private function "__log"
+    #
+    #   Store Message for Console Output at End of current Phase
+    #
+    #-----------------------------------------------------------------------
+    def __log(self,Message=''):
+
+        self.__LogBuffer.append(Message)
+        return
+
+
+
+    #-----------------------------------------------------------------------
+    # private function "__FlushLog"
+    #
+    #   Write out stored Console Messages at once
+    #
+    #-----------------------------------------------------------------------
+    def __FlushLog(self):
+
+        if len(self.__LogBuffer) > 0:
+            sys.stdout.write('\n'.join(self.__LogBuffer) + '\n')
+            sys.stdout.flush()
+            self.__LogBuffer = []
+
         return
 
 
@@ -96,53 +146,84 @@ class ffMeshNet:
     def __alert(self,Message):
 
         self.Alerts.append(Message)
-        print(Message)
+        self.__log(Message)
         return
 
 
 
     #-----------------------------------------------------------------------
-    # private function "__AddNeighbour2Cloud"
+    # private function "__GetFloodRoot"
     #
-    #   Add Nodes to Mesh-Cloud-List (recursive)
+    #   returns Seed-Node of the Flooding the given Flooding was merged into
     #
-    # MeshCloudDict[CloudID] -> List of Nodes in Mesh-Cloud
+    # FloodParent[SeedMAC] -> Seed of merging Flooding (Union-Find with Path Compression)
     #-----------------------------------------------------------------------
-    def __AddNeighbour2Cloud(self,CloudID,ffNeighbourMAC):
+    def __GetFloodRoot(self,FloodParent,SeedMAC):
 
-        if self.__NodeDict[ffNeighbourMAC]['Status'] != NODESTATE_UNKNOWN and ffNeighbourMAC not in self.__MeshCloudDict[CloudID]['CloudMembers']:
+        RootMAC = SeedMAC
 
-            if self.__NodeDict[ffNeighbourMAC]['InCloud'] is None:
-                self.__MeshCloudDict[CloudID]['NumClients'] += self.__NodeDict[ffNeighbourMAC]['Clients']
-                self.__MeshCloudDict[CloudID]['CloudMembers'].append(ffNeighbourMAC)
-                self.__NodeDict[ffNeighbourMAC]['InCloud'] = CloudID
+        while FloodParent[RootMAC] != RootMAC:
+            RootMAC = FloodParent[RootMAC]
 
-                if self.__NodeDict[ffNeighbourMAC]['GluonType'] < self.__MeshCloudDict[CloudID]['GluonType'] and self.__NodeDict[ffNeighbourMAC]['Status'] == NODESTATE_ONLINE_VPN:
-                    self.__MeshCloudDict[CloudID]['GluonType'] = self.__NodeDict[ffNeighbourMAC]['GluonType']
+        while FloodParent[SeedMAC] != RootMAC:
+            NextMAC = FloodParent[SeedMAC]
+            FloodParent[SeedMAC] = RootMAC
+            SeedMAC = NextMAC
 
-                for MeshMAC in self.__NodeDict[ffNeighbourMAC]['Neighbours']:
-                    if MeshMAC in self.__MAC2NodeIDDict:
-                        self.__AddNeighbour2Cloud(CloudID,self.__MAC2NodeIDDict[MeshMAC])
-                    else:
-                        print('!! Unknown Neighbour: %02d - %s = \'%s\' -> %s' % (
-                            self.__NodeDict[ffNeighbourMAC]['Segment'],ffNeighbourMAC,self.__NodeDict[ffNeighbourMAC]['Name'],MeshMAC))
-            elif self.__NodeDict[ffNeighbourMAC]['InCloud'] == CloudID:
-                print('!! Cloud inconsistent:',CloudID,'-',ffNeighbourMAC,'= \''+self.__NodeDict[ffNeighbourMAC]['Name']+'\' ->',self.__MeshCloudDict[CloudID]['CloudMembers'])
+        return RootMAC
+
+
+
+    #-----------------------------------------------------------------------
+    # private function "__FloodMeshCloud"
+    #
+    #   Add Seed-Node and all Nodes reachable by Neighbours to new Flooding
+    #
+    # Depth-first with explicit Stack in the order of recursive Flooding,
+    # earlier Floodings being reached are appended to the new one.
+    #-----------------------------------------------------------------------
+    def __FloodMeshCloud(self,SeedMAC,FloodParent,FloodMembers,FloodOfNode):
+
+        NodeDict       = self.__NodeDict
+        MAC2NodeIDDict = self.__MAC2NodeIDDict
+
+        FloodParent[SeedMAC]  = SeedMAC
+        FloodMembers[SeedMAC] = []
+        MemberList = FloodMembers[SeedMAC]
+
+        ffNodeMAC = SeedMAC
+        NeighbourStack = []    # (Node, Iterator of its Neighbours) along the Path
+
+        while ffNodeMAC is not None:
+            if ffNodeMAC not in FloodOfNode:
+                MemberList.append(ffNodeMAC)
+                FloodOfNode[ffNodeMAC] = SeedMAC
+                NeighbourStack.append((ffNodeMAC,iter(NodeDict[ffNodeMAC]['Neighbours'])))
             else:
-                # Node is already part of another Mesh Cloud -> merge Clouds ...
-                oldCloudID = self.__NodeDict[ffNeighbourMAC]['InCloud']
+                FloodSeed = self.__GetFloodRoot(FloodParent,FloodOfNode[ffNodeMAC])
 
-                self.__MeshCloudDict[CloudID]['NumClients']   += self.__MeshCloudDict[oldCloudID]['NumClients']
-                self.__MeshCloudDict[CloudID]['CloudMembers'] += self.__MeshCloudDict[oldCloudID]['CloudMembers']
+                if FloodSeed != SeedMAC:
+                    # Node is already part of another Flooding -> merge ...
+                    MemberList.extend(FloodMembers[FloodSeed])
+                    del FloodMembers[FloodSeed]
+                    FloodParent[FloodSeed] = SeedMAC
 
-                if self.__MeshCloudDict[oldCloudID]['GluonType'] < self.__MeshCloudDict[CloudID]['GluonType']:
-                    self.__MeshCloudDict[CloudID]['GluonType'] = self.__MeshCloudDict[oldCloudID]['GluonType']
+            ffNodeMAC = None
 
-                for ffNodeMAC in self.__NodeDict.keys():
-                    if self.__NodeDict[ffNodeMAC]['InCloud'] == oldCloudID:
-                        self.__NodeDict[ffNodeMAC]['InCloud'] = CloudID
+            while ffNodeMAC is None and len(NeighbourStack) > 0:
+                (ParentMAC,NeighbourIter) = NeighbourStack[-1]
+                MeshMAC = next(NeighbourIter,None)
+
+                if MeshMAC is None:
+                    NeighbourStack.pop()
+                else:
+                    ffNeighbourMAC = MAC2NodeIDDict.get(MeshMAC)
 
-                del self.__MeshCloudDict[oldCloudID]
+                    if ffNeighbourMAC is None:
+                        ParentNode = NodeDict[ParentMAC]
+                        self.__log('!! Unknown Neighbour: %02d - %s = \'%s\' -> %s' % (ParentNode['Segment'],ParentMAC,ParentNode['Name'],MeshMAC))
+                    elif NodeDict[ffNeighbourMAC]['Status'] != NODESTATE_UNKNOWN:
+                        ffNodeMAC = ffNeighbourMAC
 
         return
 
@@ -157,33 +238,55 @@ class ffMeshNet:
     #==============================================================================
     def CreateMeshCloudList(self):
 
-        print('\nCreate Mesh Cloud List ...')
-        TotalNodes = 0
-        TotalClients = 0
+        try:
+            self.__log('\nCreate Mesh Cloud List ...')
+            TotalNodes = 0
+            TotalClients = 0
+
+            FloodParent  = {}    # Seed of Flooding -> Seed of Flooding it was merged into
+            FloodMembers = {}    # Seed of Flooding -> Nodes in order of discovery
+            FloodOfNode  = {}    # Node -> Seed of Flooding it was added by (= already clustered)
+
+            NodeDict = self.__NodeDict
+
+            #---------- Flooding Mesh-Clouds from all meshing Nodes ----------
+            for ffNodeMAC, ffNode in NodeDict.items():
+                if ((ffNode['Status'] != NODESTATE_UNKNOWN and ffNodeMAC not in FloodOfNode) and
+                    (len(ffNode['Neighbours']) > 0)):
 
-        for ffNodeMAC in self.__NodeDict.keys():
-            if ((self.__NodeDict[ffNodeMAC]['Status'] != NODESTATE_UNKNOWN and self.__NodeDict[ffNodeMAC]['InCloud'] is None) and
-                (len(self.__NodeDict[ffNodeMAC]['Neighbours']) > 0)):
+                    self.__FloodMeshCloud(ffNodeMAC,FloodParent,FloodMembers,FloodOfNode)
 
-                self.__MeshCloudDict[ffNodeMAC] = {
+                    if len(FloodMembers[ffNodeMAC]) < 2:
+                        self.__log('++ Single-Node Cloud: %02d - %s = \'%s\'' % (ffNode['Segment'],ffNodeMAC,ffNode['Name']))
+                        del FloodOfNode[ffNodeMAC]
+                        del FloodMembers[ffNodeMAC]
+
+            #---------- Creating Mesh-Clouds, Seed of surviving Flooding is CloudID ----------
+            for CloudID, CloudMembers in FloodMembers.items():
+                MeshCloud = {
                     'NumClients': 0,
                     'GluonType': 99,
-                    'CloudMembers': [],
+                    'CloudMembers': CloudMembers,             # in order of discovery -> Tie-Break of Segments
+                    'SortedMembers': sorted(CloudMembers),    # for Reports
                     'CloudSegment': None
                 }
 
-                self.__AddNeighbour2Cloud(ffNodeMAC,ffNodeMAC)
+                for ffNodeMAC in CloudMembers:
+                    ffNode = NodeDict[ffNodeMAC]
+                    ffNode['InCloud'] = CloudID
+                    MeshCloud['NumClients'] += ffNode['Clients']
 
-                if len(self.__MeshCloudDict[ffNodeMAC]['CloudMembers']) < 2:
-                    print('++ Single-Node Cloud: %02d - %s = \'%s\'' % (self.__NodeDict[ffNodeMAC]['Segment'],ffNodeMAC,self.__NodeDict[ffNodeMAC]['Name']))
-                    self.__NodeDict[ffNodeMAC]['InCloud'] = None
-                    del self.__MeshCloudDict[ffNodeMAC]
-                else:
-                    TotalNodes   += len(self.__MeshCloudDict[ffNodeMAC]['CloudMembers'])
-                    TotalClients += self.__MeshCloudDict[ffNodeMAC]['NumClients']
+                    if ffNode['GluonType'] < MeshCloud['GluonType'] and ffNode['Status'] == NODESTATE_ONLINE_VPN:
+                        MeshCloud['GluonType'] = ffNode['GluonType']
+
+                self.__MeshCloudDict[CloudID] = MeshCloud
+                TotalNodes   += len(CloudMembers)
+                TotalClients += MeshCloud['NumClients']
+
+            self.__log('... Number of Clouds / Nodes / Clients: %d / %d / %d\n' % (len(self.__MeshCloudDict),TotalNodes,TotalClients))
+        finally:
+            self.__FlushLog()
 
-        print('... Number of Clouds / Nodes / Clients:',len(self.__MeshCloudDict),'/',TotalNodes,'/',TotalClients)
-        print()
         return
 
 
@@ -197,23 +300,42 @@ class ffMeshNet:
     def __MarkNodesInCloudForMove(self,CloudID,TargetSeg):
 
         for ffNodeMAC in self.__MeshCloudDict[CloudID]['CloudMembers']:
-            if self.__NodeDict[ffNodeMAC]['FastdKey'] is not None:
-                if int(self.__NodeDict[ffNodeMAC]['KeyDir'][3:]) != TargetSeg:
-                    FastdKey = self.__NodeDict[ffNodeMAC]['FastdKey']
+            ffNode = self.__NodeDict[ffNodeMAC]
+
+            if ffNode['FastdKey'] is not None:
+                if ffNode['KeySeg'] != TargetSeg:
+                    FastdKey = ffNode['FastdKey']
 
                     if FastdKey in self.__NodeMoveDict:
-                        print('!! Multiple Move: %s / %s -> %s' % (FastdKey,ffNodeMAC,TargetSeg))
+                        self.__log('!! Multiple Move: %s / %s -> %s' % (FastdKey,ffNodeMAC,TargetSeg))
 
                     if TargetSeg == 0:
-                        print('!! No move to Legacy: %s/peers/%s\n' % (self.__NodeDict[ffNodeMAC]['KeyDir'],self.__NodeDict[ffNodeMAC]['KeyFile']) )
+                        self.__log('!! No move to Legacy: %s/peers/%s\n' % (ffNode['KeyDir'],ffNode['KeyFile']) )
                     else:
                         self.__NodeMoveDict[FastdKey] = TargetSeg
-                        print('>> git mv %s/peers/%s vpn%02d/peers/  = \'%s\'\n' % ( self.__NodeDict[ffNodeMAC]['KeyDir'],self.__NodeDict[ffNodeMAC]['KeyFile'],
-                                                                                 TargetSeg,self.__NodeDict[ffNodeMAC]['Name'] ))
+                        self.__log('>> git mv %s/peers/%s vpn%02d/peers/  = \'%s\'\n' % ( ffNode['KeyDir'],ffNode['KeyFile'],TargetSeg,ffNode['Name'] ))
         return
 
 
 
+    #-----------------------------------------------------------------------
+    # private function "__RunBatctlTr"
+    #
+    #   returns Output of batman traceroute or None on error
+    #
+    #-----------------------------------------------------------------------
+    def __RunBatctlTr(self,BatctlCmd):
+
+        try:
+            BatctlTr = subprocess.run(BatctlCmd, stdout=subprocess.PIPE, timeout=BatmanTimeout)
+            BatctlResult = BatctlTr.stdout.decode('utf-8')
+        except:
+            BatctlResult = None
+
+        return BatctlResult
+
+
+
     #-----------------------------------------------------------------------
     # private function "__GetUplinkList"
     #
@@ -222,45 +344,75 @@ class ffMeshNet:
     #-----------------------------------------------------------------------
     def __GetUplinkList(self,NodeList,SegmentSearchList):
 
-        print('... Analysing Batman Traceroute: %s -> %s ...' % (NodeList,SegmentSearchList))
+        self.__log('... Analysing Batman Traceroute: %s -> %s ...' % (NodeList,SegmentSearchList))
+        self.__FlushLog()    # show progress before waiting for batman
         UplinkList = []
+        BatctlJobList = []
 
         for ffSeg in SegmentSearchList:
             for ffNodeMAC in NodeList:
                 BatctlCmd = ('/usr/sbin/batctl meshif bat%02d tr %s' % (ffSeg,ffNodeMAC)).split()
+                BatctlJobList.append((ffSeg,ffNodeMAC,BatctlCmd))
 
-                try:
-                    BatctlTr = subprocess.run(BatctlCmd, stdout=subprocess.PIPE, timeout=BatmanTimeout)
-                    BatctlResult = BatctlTr.stdout.decode('utf-8')
-                except:
-                    print('++ ERROR accessing batman: % s' % (BatctlCmd))
+        #---------- Running all traceroutes in parallel, parsing in original order ----------
+        with ThreadPoolExecutor(max_workers=MaxBatctlWorkers) as BatctlPool:
+            BatctlFutureList = []
+
+            for (ffSeg,ffNodeMAC,BatctlCmd) in BatctlJobList:
+                BatctlFutureList.append(BatctlPool.submit(self.__RunBatctlTr,BatctlCmd))
+
+            for (ffSeg,ffNodeMAC,BatctlCmd), BatctlFuture in zip(BatctlJobList,BatctlFutureList):
+                BatctlResult = BatctlFuture.result()
+
+                if BatctlResult is None:
+                    self.__log('++ ERROR accessing batman: % s' % (BatctlCmd))
                 else:
                     MeshMAC = None
                     GwMAC = None
 
                     for BatctlLine in BatctlResult.split('\n'):
-                        BatctlInfo = BatctlLine.replace('(',' ').replace(')',' ').split()
-#                        print(MeshMAC,BatctlInfo)
-
-                        if len(BatctlInfo) > 3:
-                            if BatctlInfo[0] == 'traceroute':
-                                MeshMAC = BatctlInfo[3]
-                            elif MeshMAC is not None:
-                                if MacAdrTemplate.match(BatctlInfo[1]):
-                                    if GwMacTemplate.match(BatctlInfo[1]):
-                                        GwMAC = BatctlInfo[1]
-                                    elif GwMAC is not None:
-                                        if BatctlInfo[1] == MeshMAC:
-                                            UplinkList.append(ffNodeMAC)
-                                            self.__NodeDict[ffNodeMAC]['Status'] = NODESTATE_ONLINE_VPN
-                                            self.__NodeDict[ffNodeMAC]['FastdGW'] = 'gw%sn%s' % (GwMAC[12:14],GwMAC[15:17])
-                                            self.__NodeDict[ffNodeMAC]['Segment'] = ffSeg
-                                        break
+                        if MeshMAC is None:
+                            TrHeadMatch = BatctlTrHeadTemplate.match(BatctlLine)
+
+                            if TrHeadMatch:
+                                MeshMAC = TrHeadMatch.group(1)
+                        else:
+                            TrHopMatch = BatctlTrHopTemplate.match(BatctlLine)
+
+                            if TrHopMatch:
+                                HopMAC = TrHopMatch.group(1)
+
+                                if HopMAC.startswith(GwMacPrefix) and GwMacTemplate.match(HopMAC):
+                                    GwMAC = HopMAC
+                                elif GwMAC is not None:
+                                    if HopMAC == MeshMAC:
+                                        UplinkList.append(ffNodeMAC)
+                                        ffNode = self.__NodeDict[ffNodeMAC]
+                                        ffNode['Status']  = NODESTATE_ONLINE_VPN
+                                        ffNode['FastdGW'] = 'gw%sn%s' % (GwMAC[12:14],GwMAC[15:17])
+                                        ffNode['Segment'] = ffSeg
+                                    break
 
         return UplinkList
 
 
 
+    #-----------------------------------------------------------------------
+    # private function "__GetBestSegment"
+    #
+    #   returns Segment with highest Weight (and UpTime) or None
+    #
+    #-----------------------------------------------------------------------
+    def __GetBestSegment(self,SegWeightDict):
+
+        if len(SegWeightDict) == 0:
+            return None
+
+        BestSegment = max(SegWeightDict.items(), key=lambda SegItem: (SegItem[1]['Weight'],SegItem[1]['UpTime']))
+        return BestSegment[0]
+
+
+
     #==============================================================================
     # public function "CheckMeshClouds"
     #
@@ -269,113 +421,94 @@ class ffMeshNet:
     #==============================================================================
     def CheckMeshClouds(self):
 
-        print('Checking Mesh-Clouds ...')
+        try:
+            self.__log('Checking Mesh-Clouds ...')
 
-        for CloudID in self.__MeshCloudDict:
-            DesiredSegDict = {}    # Weight and UpTime of Nodes per Home-Segment
-            UpLinkSegDict  = {}    # Weight and UpTime of UpLink-Nodes per Segment
-            CurrentSegList = []    # List of current Segments of the Nodes
+            NodeDict = self.__NodeDict
 
-            #---------- Analysing nodes and related desired segments ----------
-            for ffNodeMAC in self.__MeshCloudDict[CloudID]['CloudMembers']:
-                NodeSeg = self.__NodeDict[ffNodeMAC]['Segment']
-                HomeSeg = self.__NodeDict[ffNodeMAC]['HomeSeg']
+            for CloudID in self.__MeshCloudDict:
+                MeshCloud = self.__MeshCloudDict[CloudID]
 
+                DesiredSegDict = defaultdict(lambda: { 'Weight': 0, 'UpTime': 0 })  # Weight and UpTime of Nodes per Home-Segment
+                UpLinkSegDict  = defaultdict(lambda: { 'Weight': 0, 'UpTime': 0 })  # Weight and UpTime of UpLink-Nodes per Segment
+                CurrentSegDict = defaultdict(int)                                   # Number of Nodes per current Segment
 
-                if self.__NodeDict[ffNodeMAC]['SegMode'][:3] == 'fix':
-                    NodeWeigt = NODEWEIGHT_SEGMENT_FIX
-                elif self.__NodeDict[ffNodeMAC]['Status'] == NODESTATE_ONLINE_VPN:
-                    NodeWeigt = NODEWEIGHT_UPLINK
-                elif self.__NodeDict[ffNodeMAC]['Status'] == NODESTATE_ONLINE_MESH:
-                    NodeWeigt = NODEWEIGHT_MESH_ONLY
-                else:
-                    NodeWeigt = NODEWEIGHT_OFFLINE
+                #---------- Analysing nodes and related desired segments ----------
+                for ffNodeMAC in MeshCloud['CloudMembers']:
+                    ffNode  = NodeDict[ffNodeMAC]
+                    NodeSeg = ffNode['Segment']
+                    HomeSeg = ffNode['HomeSeg']
 
-                if HomeSeg is not None:
-                    if HomeSeg not in DesiredSegDict:
-                        DesiredSegDict[HomeSeg] = { 'Weight': NodeWeigt, 'UpTime': self.__NodeDict[ffNodeMAC]['UpTime'] }
+                    if ffNode['SegMode'].startswith('fix'):
+                        NodeWeigt = NODEWEIGHT_SEGMENT_FIX
                     else:
-                        DesiredSegDict[HomeSeg]['Weight'] += NodeWeigt
+                        NodeWeigt = NodeWeightOfState.get(ffNode['Status'],NODEWEIGHT_OFFLINE)
+
+                    if HomeSeg is not None:
+                        SegInfo = DesiredSegDict[HomeSeg]
+                        SegInfo['Weight'] += NodeWeigt
+
+                        if ffNode['UpTime'] > SegInfo['UpTime']:
+                            SegInfo['UpTime'] = ffNode['UpTime']
+
+                    if NodeSeg is not None:
+                        CurrentSegDict[NodeSeg] += 1
+
+                        if ffNode['Status'] == NODESTATE_ONLINE_VPN:
+                            SegInfo = UpLinkSegDict[NodeSeg]
+                            SegInfo['Weight'] += NodeWeigt
+
+                            if ffNode['UpTime'] > SegInfo['UpTime']:
+                                SegInfo['UpTime'] = ffNode['UpTime']
 
-                        if self.__NodeDict[ffNodeMAC]['UpTime'] > DesiredSegDict[HomeSeg]['UpTime']:
-                            DesiredSegDict[HomeSeg]['UpTime'] = self.__NodeDict[ffNodeMAC]['UpTime']
+                if len(UpLinkSegDict) == 0:
+                    self.__log('++ Cloud seems to be w/o VPN Uplink(s): %s' % (MeshCloud['CloudMembers']))
+                    SearchList = list(CurrentSegDict)   # current Segments first, then desired ones
 
-                if NodeSeg is not None:
-                    if NodeSeg not in CurrentSegList:
-                        CurrentSegList.append(NodeSeg)
+                    for Segment in DesiredSegDict:
+                        if Segment not in CurrentSegDict:
+                            SearchList.append(Segment)
 
-                    if self.__NodeDict[ffNodeMAC]['Status'] == NODESTATE_ONLINE_VPN:
-                        if NodeSeg not in UpLinkSegDict:
-                            UpLinkSegDict[NodeSeg] = { 'Weight': NodeWeigt, 'UpTime': self.__NodeDict[ffNodeMAC]['UpTime'] }
+                    for ffNodeMAC in self.__GetUplinkList(MeshCloud['CloudMembers'],SearchList):
+                        ffNode  = NodeDict[ffNodeMAC]
+                        NodeSeg = ffNode['Segment']
+                        self.__log('>> Uplink found by Batman: Seg.%02d %s - %s = \'%s\'' % (NodeSeg,ffNode['FastdGW'],ffNodeMAC,ffNode['Name']))
+
+                        if ffNode['SegMode'].startswith('fix'):
+                            NodeWeigt = NODEWEIGHT_SEGMENT_FIX
                         else:
-                            UpLinkSegDict[NodeSeg]['Weight'] += NodeWeigt
+                            NodeWeigt = NODEWEIGHT_UPLINK
+                        SegInfo = UpLinkSegDict[NodeSeg]
+                        SegInfo['Weight'] += NodeWeigt
 
-                            if self.__NodeDict[ffNodeMAC]['UpTime'] > UpLinkSegDict[NodeSeg]['UpTime']:
-                                UpLinkSegDict[NodeSeg]['UpTime'] = self.__NodeDict[ffNodeMAC]['UpTime']
+                        if ffNode['UpTime'] > SegInfo['UpTime']:
+                            SegInfo['UpTime'] = ffNode['UpTime']
 
-            if len(UpLinkSegDict) == 0:
-                print('++ Cloud seems to be w/o VPN Uplink(s):',self.__MeshCloudDict[CloudID]['CloudMembers'])
-                SearchList = CurrentSegList
+                #---------- Calculating desired Segment for the Cloud ----------
+                CloudSegment = self.__GetBestSegment(DesiredSegDict)
 
-                for Segment in DesiredSegDict:
-                    if Segment not in SearchList:
-                        SearchList.append(Segment)
+                if CloudSegment is None:
+                    CloudSegment = self.__GetBestSegment(UpLinkSegDict)
 
-                for ffNodeMAC in self.__GetUplinkList(self.__MeshCloudDict[CloudID]['CloudMembers'],SearchList):
-                    NodeSeg = self.__NodeDict[ffNodeMAC]['Segment']
-                    print('>> Uplink found by Batman: Seg.%02d %s - %s = \'%s\'' % (NodeSeg,self.__NodeDict[ffNodeMAC]['FastdGW'],ffNodeMAC,self.__NodeDict[ffNodeMAC]['Name']))
+                MeshCloud['CloudSegment'] = CloudSegment
 
-                    if self.__NodeDict[ffNodeMAC]['SegMode'][:3] == 'fix':
-                        NodeWeigt = NODEWEIGHT_SEGMENT_FIX
+                #---------- Actions depending of situation in cloud ----------
+                if len(CurrentSegDict) > 1:
+                    self.__alert('!! Shortcut detected in Cloud %s: CurrentSegs = %d / UplinkSegs = %d' % (CloudID,len(CurrentSegDict),len(UpLinkSegDict)))
+                    if CloudSegment is None:
+                        self.__alert('!! Shortcut cannot be corrected, missing CloudSegment !!')
+                        self.AnalyseOnly = True
                     else:
-                        NodeWeigt = NODEWEIGHT_UPLINK
+                        self.__alert('** Shortcut in Cloud %s will be corrected, Number of Nodes = %d, Segment = %02d  ...' % (CloudID,len(MeshCloud['CloudMembers']),CloudSegment))
+                        self.__log('%s\n' % (MeshCloud['CloudMembers']))
 
-                    if NodeSeg not in UpLinkSegDict:
-                        UpLinkSegDict[NodeSeg] = { 'Weight': NodeWeigt, 'UpTime': self.__NodeDict[ffNodeMAC]['UpTime'] }
-                    else:
-                        UpLinkSegDict[NodeSeg]['Weight'] += NodeWeigt
-
-                        if self.__NodeDict[ffNodeMAC]['UpTime'] > UpLinkSegDict[NodeSeg]['UpTime']:
-                            UpLinkSegDict[NodeSeg]['UpTime'] = self.__NodeDict[ffNodeMAC]['UpTime']
-
-            #---------- Calculating desired Segment for the Cloud ----------
-            CloudSegment = None
-            SegWeight = 0
-            SegUpTime = 0
-
-            for Segment in DesiredSegDict:
-                if (DesiredSegDict[Segment]['Weight'] > SegWeight
-                or (DesiredSegDict[Segment]['Weight'] == SegWeight and DesiredSegDict[Segment]['UpTime'] > SegUpTime)):
-                    CloudSegment = Segment
-                    SegWeight = DesiredSegDict[Segment]['Weight']
-                    SegUpTime = DesiredSegDict[Segment]['UpTime']
-
-            if CloudSegment is None:
-                for Segment in UpLinkSegDict:
-                    if (UpLinkSegDict[Segment]['Weight'] > SegWeight
-                    or (UpLinkSegDict[Segment]['Weight'] == SegWeight and UpLinkSegDict[Segment]['UpTime'] > SegUpTime)):
-                        CloudSegment = Segment
-                        SegWeight = UpLinkSegDict[Segment]['Weight']
-                        SegUpTime = UpLinkSegDict[Segment]['UpTime']
-
-            self.__MeshCloudDict[CloudID]['CloudSegment'] = CloudSegment
-
-            #---------- Actions depending of situation in cloud ----------
-            if len(CurrentSegList) > 1:
-                self.__alert('!! Shortcut detected in Cloud %s: CurrentSegs = %d / UplinkSegs = %d' % (CloudID,len(CurrentSegList),len(UpLinkSegDict)))
-                if CloudSegment is None:
-                    self.__alert('!! Shortcut cannot be corrected, missing CloudSegment !!')
-                    self.AnalyseOnly = True
-                else:
-                    self.__alert('** Shortcut in Cloud %s will be corrected, Number of Nodes = %d, Segment = %02d  ...' %
-                                    (CloudID,len(self.__MeshCloudDict[CloudID]['CloudMembers']),CloudSegment))
-                    print(self.__MeshCloudDict[CloudID]['CloudMembers'])
-                    print()
+                if CloudSegment is not None:
+                    self.__MarkNodesInCloudForMove(CloudID,CloudSegment)
 
-            if CloudSegment is not None:
-                self.__MarkNodesInCloudForMove(CloudID,CloudSegment)
+            self.__log('... done.\n')
+        finally:
+            self.__FlushLog()
 
-        print('... done.\n')
         return
 
 
@@ -388,37 +521,39 @@ class ffMeshNet:
     #==============================================================================
     def CheckSingleNodes(self):
 
-        print('Checking Single Nodes ...')
+        try:
+            self.__log('Checking Single Nodes ...')
 
-        for ffNodeMAC in self.__NodeDict.keys():
-            if ((self.__NodeDict[ffNodeMAC]['InCloud'] is None and self.__NodeDict[ffNodeMAC]['Status'] != NODESTATE_UNKNOWN) and
-                (self.__NodeDict[ffNodeMAC]['KeyDir'][:3] == 'vpn')):
+            for ffNodeMAC, ffNode in self.__NodeDict.items():
+                if ((ffNode['InCloud'] is None and ffNode['Status'] != NODESTATE_UNKNOWN) and
+                    (ffNode['KeySeg'] is not None)):
 
-                if self.__NodeDict[ffNodeMAC]['Status'] == NODESTATE_ONLINE_MESH:
-                    print('++ Node seems to be w/o VPN Uplink: %s / %s = \'%s\'' % (self.__NodeDict[ffNodeMAC]['KeyDir'],ffNodeMAC,self.__NodeDict[ffNodeMAC]['Name']))
-                    NodeSeg = int(self.__NodeDict[ffNodeMAC]['KeyDir'][3:])
+                    if ffNode['Status'] == NODESTATE_ONLINE_MESH:
+                        self.__log('++ Node seems to be w/o VPN Uplink: %s / %s = \'%s\'' % (ffNode['KeyDir'],ffNodeMAC,ffNode['Name']))
+                        NodeSeg = ffNode['KeySeg']
 
-                    for UplinkNodeMAC in self.__GetUplinkList([ffNodeMAC],[ NodeSeg ]):
-                        print('>> Uplink found by Batman: Seg.%02d %s - %s = \'%s\'' %
-                                (NodeSeg,self.__NodeDict[ffNodeMAC]['FastdGW'],UplinkNodeMAC,self.__NodeDict[UplinkNodeMAC]['Name']))
+                        for UplinkNodeMAC in self.__GetUplinkList([ffNodeMAC],[ NodeSeg ]):
+                            self.__log('>> Uplink found by Batman: Seg.%02d %s - %s = \'%s\'' % (NodeSeg,ffNode['FastdGW'],UplinkNodeMAC,self.__NodeDict[UplinkNodeMAC]['Name']))
 
-                TargetSeg = self.__NodeDict[ffNodeMAC]['HomeSeg']
+                    TargetSeg = ffNode['HomeSeg']
 
-                if TargetSeg is not None:
-                    if int(self.__NodeDict[ffNodeMAC]['KeyDir'][3:]) != TargetSeg:
-                        if TargetSeg <= 8 or self.__NodeDict[ffNodeMAC]['GluonType'] >= NODETYPE_DNS_SEGASSIGN:
-                            FastdKey = self.__NodeDict[ffNodeMAC]['FastdKey']
+                    if TargetSeg is not None:
+                        if ffNode['KeySeg'] != TargetSeg:
+                            if TargetSeg <= 8 or ffNode['GluonType'] >= NODETYPE_DNS_SEGASSIGN:
+                                FastdKey = ffNode['FastdKey']
 
-                            if FastdKey in self.__NodeMoveDict:
-                                print('!! Multiple Move: %s / %s -> %s' % (FastdKey,ffNodeMAC,TargetSeg))
+                                if FastdKey in self.__NodeMoveDict:
+                                    self.__log('!! Multiple Move: %s / %s -> %s' % (FastdKey,ffNodeMAC,TargetSeg))
 
-                            self.__NodeMoveDict[FastdKey] = TargetSeg
-                            print('>> git mv %s/peers/%s vpn%02d/peers/  = \'%s\'' % (self.__NodeDict[ffNodeMAC]['KeyDir'],self.__NodeDict[ffNodeMAC]['KeyFile'],
-                                                                                      TargetSeg,self.__NodeDict[ffNodeMAC]['Name'] ))
-                        else:
-                            print('!! Gluon too old for desired Segment: %s = \'%s\' -> Seg. %02d' % (ffNodeMAC,self.__NodeDict[ffNodeMAC]['Name'],TargetSeg))
+                                self.__NodeMoveDict[FastdKey] = TargetSeg
+                                self.__log('>> git mv %s/peers/%s vpn%02d/peers/  = \'%s\'' % (ffNode['KeyDir'],ffNode['KeyFile'],TargetSeg,ffNode['Name'] ))
+                            else:
+                                self.__log('!! Gluon too old for desired Segment: %s = \'%s\' -> Seg. %02d' % (ffNodeMAC,ffNode['Name'],TargetSeg))
+
+            self.__log('... done.\n')
+        finally:
+            self.__FlushLog()
 
-        print('... done.\n')
         return
 
 
@@ -440,6 +575,25 @@ class ffMeshNet:
 
 
 
+    #-----------------------------------------------------------------------
+    # private function "__FormatNodeLine"
+    #
+    #   returns Line of Node for Mesh Cloud List
+    #
+    #-----------------------------------------------------------------------
+    def __FormatNodeLine(self,CurrentError,Segment,ffNodeMAC,ffNode):
+
+        if CurrentError == ' ':
+            CurrentError = GLUON_MARKER[ffNode['GluonType']]
+
+        if ffNode['FastdGW'] is None:
+            ffNode['FastdGW'] = ''
+
+        return NodeLineFormat % (CurrentError, ffNode['Status'], Segment, ffNode['Clients'], ffNodeMAC, ffNode['FastdGW'],
+                                 ffNode['KeyFile'], ffNode['Name'], ffNode['HomeSeg'], ffNode['Region'], ffNode['UpTime'])
+
+
+
     #-----------------------------------------------------------------------
     # private function "__WriteMeshClouds"
     #
@@ -447,94 +601,89 @@ class ffMeshNet:
     #-----------------------------------------------------------------------
     def __WriteMeshClouds(self,MeshCloudFile):
 
-        print('\nWriting out Nodes in Mesh Clouds ...')
-        MeshCloudFile.write('FF-Mesh-Clouds on %s\n' % datetime.datetime.now())
+        self.__log('\nWriting out Nodes in Mesh Clouds ...')
+        FileWrite = MeshCloudFile.write
+
+        FileWrite('FF-Mesh-Clouds on %s\n' % datetime.datetime.now())
         TotalMeshingNodes = 0
 
         for CloudID in sorted(self.__MeshCloudDict):
+            MeshCloud = self.__MeshCloudDict[CloudID]
 
             TotalNodes    = 0
             TotalClients  = 0
             TotalUplinks  = 0
 
-            CurrentSeg    = self.__MeshCloudDict[CloudID]['CloudSegment']
+            CurrentSeg    = MeshCloud['CloudSegment']
             CurrentVPN    = None
             CurrentRegion = None
             CurrentZIP    = None
             CurrentError  = ''
 
-            MeshCloudFile.write('\n------------------------------------------------------------------------------------------------------------------\n')
-            TotalMeshingNodes += len(self.__MeshCloudDict[CloudID]['CloudMembers'])
+            CloudLines = [ CloudSeparator ]
+            TotalMeshingNodes += len(MeshCloud['CloudMembers'])
 
-            for ffnb in sorted(self.__MeshCloudDict[CloudID]['CloudMembers']):
+            for ffnb in MeshCloud['SortedMembers']:
+                ffNode = self.__NodeDict[ffnb]
                 CurrentError = ' '
 
-                if self.__NodeDict[ffnb]['Segment'] is None:
+                if ffNode['Segment'] is None:
                     Segment = 99
                 else:
-                    Segment = self.__NodeDict[ffnb]['Segment']
+                    Segment = ffNode['Segment']
 
                     if CurrentSeg is None:
-                        print('++ ERROR CloudSegment is None -> Setting Seg. %02d !!' % (Segment))
+                        self.__log('++ ERROR CloudSegment is None -> Setting Seg. %02d !!' % (Segment))
                         CurrentSeg = Segment
                     elif Segment != CurrentSeg:
 #                        print('++ ERROR Segment:',ffnb,'=',CurrentSeg,'<>',Segment)
                         CurrentError = '!'
 
                     if CurrentRegion is None or CurrentRegion == '??':
-                        CurrentRegion = self.__NodeDict[ffnb]['Region']
-                    elif self.__NodeDict[ffnb]['Region'] != '??' and self.__NodeDict[ffnb]['Region'] != CurrentRegion:
-                        print('++ ERROR Region:',ffnb,'= \''+self.__NodeDict[ffnb]['Name']+'\' ->',self.__NodeDict[ffnb]['Region'],'<>',CurrentRegion)
+                        CurrentRegion = ffNode['Region']
+                    elif ffNode['Region'] != '??' and ffNode['Region'] != CurrentRegion:
+                        self.__log('++ ERROR Region: %s = \'%s\' -> %s <> %s' % (ffnb,ffNode['Name'],ffNode['Region'],CurrentRegion))
                         CurrentError = '!'
 
                     if CurrentZIP is None:
-                        CurrentZIP = self.__NodeDict[ffnb]['ZIP']
+                        CurrentZIP = ffNode['ZIP']
 
-                if CurrentError == ' ' and self.__NodeDict[ffnb]['SegMode'] != 'auto':
+                if CurrentError == ' ' and ffNode['SegMode'] != 'auto':
                     CurrentError = '+'
 
-                if CurrentError == ' ' and self.__NodeDict[ffnb]['KeyDir'] != '':
-                    if ((self.__NodeDict[ffnb]['Segment'] is not None and int(self.__NodeDict[ffnb]['KeyDir'][3:]) != self.__NodeDict[ffnb]['Segment']) or
-                        (self.__NodeDict[ffnb]['HomeSeg'] is not None and self.__NodeDict[ffnb]['HomeSeg'] != self.__NodeDict[ffnb]['Segment'])):
-                        print('++ ERROR Region:',self.__NodeDict[ffnb]['Status'],ffnb,'= \''+self.__NodeDict[ffnb]['Name']+'\' ->',
-                              self.__NodeDict[ffnb]['KeyDir'],self.__NodeDict[ffnb]['Segment'],'->',
-                              self.__NodeDict[ffnb]['HomeSeg'],self.__NodeDict[ffnb]['SegMode'])
+                if CurrentError == ' ' and ffNode['KeyDir'] != '':
+                    if ((ffNode['Segment'] is not None and ffNode['KeySeg'] != ffNode['Segment']) or
+                        (ffNode['HomeSeg'] is not None and ffNode['HomeSeg'] != ffNode['Segment'])):
+                        self.__log('++ ERROR Region: %s %s = \'%s\' -> %s %s -> %s %s' % (
+                                   ffNode['Status'],ffnb,ffNode['Name'],ffNode['KeyDir'],
+                                   ffNode['Segment'],ffNode['HomeSeg'],ffNode['SegMode']))
                         CurrentError = '>'
 
-                if CurrentVPN is None and self.__NodeDict[ffnb]['KeyDir'] != '':
-                    CurrentVPN = self.__NodeDict[ffnb]['KeyDir']
-                elif CurrentVPN is not None and self.__NodeDict[ffnb]['KeyDir'] != '' and self.__NodeDict[ffnb]['KeyDir'] != CurrentVPN:
-                    print('++ ERROR KeyDir:',self.__NodeDict[ffnb]['Status'],ffnb,'=',CurrentVPN,'<>',self.__NodeDict[ffnb]['KeyDir'])
+                if CurrentVPN is None and ffNode['KeyDir'] != '':
+                    CurrentVPN = ffNode['KeyDir']
+                elif CurrentVPN is not None and ffNode['KeyDir'] != '' and ffNode['KeyDir'] != CurrentVPN:
+                    self.__log('++ ERROR KeyDir: %s %s = %s <> %s' % (ffNode['Status'],ffnb,CurrentVPN,ffNode['KeyDir']))
                     CurrentError = '*'
 
-                if CurrentError == ' ':
-                    CurrentError = GLUON_MARKER[self.__NodeDict[ffnb]['GluonType']]
-
-                if self.__NodeDict[ffnb]['FastdGW'] is None:
-                    self.__NodeDict[ffnb]['FastdGW'] = ''
-
-                MeshCloudFile.write('%s%s Seg.%02d [%3d] %s = %7s - %16s = \'%s\' (%s = %s) UpT = %d\n' % (CurrentError, self.__NodeDict[ffnb]['Status'], Segment,
-                                                                                                self.__NodeDict[ffnb]['Clients'], ffnb, self.__NodeDict[ffnb]['FastdGW'],
-                                                                                                self.__NodeDict[ffnb]['KeyFile'], self.__NodeDict[ffnb]['Name'],
-                                                                                                self.__NodeDict[ffnb]['HomeSeg'], self.__NodeDict[ffnb]['Region'],
-                                                                                                self.__NodeDict[ffnb]['UpTime']))
+                CloudLines.append(self.__FormatNodeLine(CurrentError,Segment,ffnb,ffNode))
 
-                if self.__NodeDict[ffnb]['Status'] in [ NODESTATE_ONLINE_MESH, NODESTATE_ONLINE_VPN ]:
+                if ffNode['Status'] in NODESTATES_ONLINE:
                     TotalNodes   += 1
-                    TotalClients += self.__NodeDict[ffnb]['Clients']
+                    TotalClients += ffNode['Clients']
 
-                if self.__NodeDict[ffnb]['Status'] == NODESTATE_ONLINE_VPN:
+                if ffNode['Status'] == NODESTATE_ONLINE_VPN:
                     TotalUplinks += 1
 
-            MeshCloudFile.write('\n          Total Online-Nodes / Clients / Uplinks = %3d / %3d / %3d   (Seg. %02d)\n' % (TotalNodes,TotalClients,TotalUplinks,CurrentSeg))
+            CloudLines.append('\n          Total Online-Nodes / Clients / Uplinks = %3d / %3d / %3d   (Seg. %02d)\n' % (TotalNodes,TotalClients,TotalUplinks,CurrentSeg))
+            MeshCloudFile.writelines(CloudLines)
 
-            for ffnb in self.__MeshCloudDict[CloudID]['CloudMembers']:
-                self.__NodeDict[ffnb]['Segment'] = CurrentSeg
-                self.__NodeDict[ffnb]['Region']  = CurrentRegion
-                self.__NodeDict[ffnb]['ZIP']     = CurrentZIP
+            CloudLocation = { 'Segment': CurrentSeg, 'Region': CurrentRegion, 'ZIP': CurrentZIP }
 
-        print('\nSum: %d Clouds with %d Nodes\n' % (len(self.__MeshCloudDict),TotalMeshingNodes))
-        MeshCloudFile.write('\nSum: %d Clouds with %d Nodes\n' % (len(self.__MeshCloudDict),TotalMeshingNodes))
+            for ffnb in MeshCloud['CloudMembers']:
+                self.__NodeDict[ffnb].update(CloudLocation)
+
+        self.__log('\nSum: %d Clouds with %d Nodes\n' % (len(self.__MeshCloudDict),TotalMeshingNodes))
+        FileWrite('\nSum: %d Clouds with %d Nodes\n' % (len(self.__MeshCloudDict),TotalMeshingNodes))
         return
 
 
@@ -546,42 +695,38 @@ class ffMeshNet:
     #-----------------------------------------------------------------------
     def __WriteSingleNodes(self,MeshCloudFile):
 
-        print('\nWriting out Single Nodes ...')
-        MeshCloudFile.write('\n\n########################################################################\n\n')
-        MeshCloudFile.write('Single Nodes:\n\n')
+        self.__log('\nWriting out Single Nodes ...')
+        SingleLines = [ SectionSeparator, 'Single Nodes:\n\n' ]
 
-        for ffnb in sorted(self.__NodeDict.keys()):
-            if (self.__NodeDict[ffnb]['InCloud'] is None
-            and self.__NodeDict[ffnb]['Status'] in [ NODESTATE_ONLINE_MESH, NODESTATE_ONLINE_VPN ]
-            and self.__NodeDict[ffnb]['KeyDir'] != ''):
+        SingleNodeList = []
 
-                CurrentError = ' '
+        for ffNodeMAC, ffNode in self.__NodeDict.items():
+            if (ffNode['InCloud'] is None
+            and ffNode['Status'] in NODESTATES_ONLINE
+            and ffNode['KeyDir'] != ''):
+                SingleNodeList.append(ffNodeMAC)
 
-                if self.__NodeDict[ffnb]['SegMode'] != 'auto':
-                    CurrentError = '+'
+        for ffnb in sorted(SingleNodeList):
+            ffNode = self.__NodeDict[ffnb]
+            CurrentError = ' '
 
-                elif self.__NodeDict[ffnb]['HomeSeg'] is not None and self.__NodeDict[ffnb]['HomeSeg'] != int(self.__NodeDict[ffnb]['KeyDir'][3:]):
-                    print('++ ERROR Region:',self.__NodeDict[ffnb]['Status'],ffnb,self.__NodeDict[ffnb]['KeyDir'],
-                          self.__NodeDict[ffnb]['Segment'],'->',self.__NodeDict[ffnb]['HomeSeg'],self.__NodeDict[ffnb]['SegMode'])
+            if ffNode['SegMode'] != 'auto':
+                CurrentError = '+'
 
-                    CurrentError = '>'
+            elif ffNode['HomeSeg'] is not None and ffNode['HomeSeg'] != ffNode['KeySeg']:
+                self.__log('++ ERROR Region: %s %s %s %s -> %s %s' % (ffNode['Status'],ffnb,ffNode['KeyDir'],
+                           ffNode['Segment'],ffNode['HomeSeg'],ffNode['SegMode']))
 
-                if self.__NodeDict[ffnb]['Segment'] is None:
-                    Segment = 99
-                else:
-                    Segment = self.__NodeDict[ffnb]['Segment']
+                CurrentError = '>'
 
-                if CurrentError == ' ':
-                    CurrentError = GLUON_MARKER[self.__NodeDict[ffnb]['GluonType']]
+            if ffNode['Segment'] is None:
+                Segment = 99
+            else:
+                Segment = ffNode['Segment']
 
-                if self.__NodeDict[ffnb]['FastdGW'] is None:
-                    self.__NodeDict[ffnb]['FastdGW'] = ''
+            SingleLines.append(self.__FormatNodeLine(CurrentError,Segment,ffnb,ffNode))
 
-                MeshCloudFile.write('%s%s Seg.%02d [%3d] %s = %7s - %16s = \'%s\' (%s = %s) UpT = %d\n' % (CurrentError, self.__NodeDict[ffnb]['Status'],
-                                                                                                Segment,self.__NodeDict[ffnb]['Clients'], ffnb,
-                                                                                                self.__NodeDict[ffnb]['FastdGW'], self.__NodeDict[ffnb]['KeyFile'],
-                                                                                                self.__NodeDict[ffnb]['Name'], self.__NodeDict[ffnb]['HomeSeg'],
-                                                                                                self.__NodeDict[ffnb]['Region'], self.__NodeDict[ffnb]['UpTime']))
+        MeshCloudFile.writelines(SingleLines)
         return
 
 
@@ -593,35 +738,33 @@ class ffMeshNet:
     #-----------------------------------------------------------------------
     def __CalculateStatistics(self,SegmentDict,RegionDict):
 
-        for ffNodeMAC in self.__NodeDict.keys():
-            if self.__NodeDict[ffNodeMAC]['Status'] in [ NODESTATE_ONLINE_MESH, NODESTATE_ONLINE_VPN ]:
-                ffSegment = self.__NodeDict[ffNodeMAC]['Segment']
-                ffRegion  = self.__NodeDict[ffNodeMAC]['Region']
-
-                if ffSegment not in SegmentDict:
-                    SegmentDict[ffSegment] = { 'Nodes':0, 'Clients':0, 'Uplinks':0, 'BlindLoad':0 }
+        for ffNode in self.__NodeDict.values():
+            if ffNode['Status'] in NODESTATES_ONLINE:
+                ffSegment = ffNode['Segment']
+                ffRegion  = ffNode['Region']
+                SegStats  = SegmentDict[ffSegment]
 
-                SegmentDict[ffSegment]['Nodes'] += 1
-                SegmentDict[ffSegment]['Clients'] += self.__NodeDict[ffNodeMAC]['Clients']
+                SegStats['Nodes']   += 1
+                SegStats['Clients'] += ffNode['Clients']
 
-                if self.__NodeDict[ffNodeMAC]['Status'] == NODESTATE_ONLINE_VPN:
-                    SegmentDict[ffSegment]['Uplinks'] += 1
-
-                ffRegion  = self.__NodeDict[ffNodeMAC]['Region']
+                if ffNode['Status'] == NODESTATE_ONLINE_VPN:
+                    SegStats['Uplinks'] += 1
 
                 if ffRegion is None or ffRegion == '??':
-                    SegmentDict[ffSegment]['BlindLoad'] += 1 + self.__NodeDict[ffNodeMAC]['Clients']
+                    SegStats['BlindLoad'] += 1 + ffNode['Clients']
                     ffRegion = '-- undefined --'
                     ffSegment = 0
 
-                if ffRegion not in RegionDict:
-                    RegionDict[ffRegion] = { 'Nodes':0, 'Clients':0, 'OldGluon':0, 'Segment':ffSegment }
+                RegionStats = RegionDict.get(ffRegion)
+
+                if RegionStats is None:
+                    RegionStats = RegionDict[ffRegion] = { 'Nodes':0, 'Clients':0, 'OldGluon':0, 'Segment':ffSegment }
 
-                RegionDict[ffRegion]['Nodes']    += 1
-                RegionDict[ffRegion]['Clients']  += self.__NodeDict[ffNodeMAC]['Clients']
+                RegionStats['Nodes']    += 1
+                RegionStats['Clients']  += ffNode['Clients']
 
-                if self.__NodeDict[ffNodeMAC]['GluonType'] < NODETYPE_MCAST_ff05:
-                    RegionDict[ffRegion]['OldGluon'] += 1
+                if ffNode['GluonType'] < NODETYPE_MCAST_ff05:
+                    RegionStats['OldGluon'] += 1
 
         return
 
@@ -634,43 +777,40 @@ class ffMeshNet:
     #-----------------------------------------------------------------------
     def __WriteStatistics(self,MeshCloudFile):
 
-        SegmentDict = {}
+        SegmentDict = defaultdict(lambda: { 'Nodes':0, 'Clients':0, 'Uplinks':0, 'BlindLoad':0 })
         RegionDict  = {}
 
         self.__CalculateStatistics(SegmentDict,RegionDict)
 
-        print('\nWrite out Statistics ...')
-        MeshCloudFile.write('\n\n########################################################################\n\n')
-        MeshCloudFile.write('Online-Nodes      / Clients / Sum:\n\n')
-
-        TotalNodes   = 0
-        TotalClients = 0
-        TotalUplinks = 0
+        self.__log('\nWrite out Statistics ...')
+        StatLines = [ SectionSeparator, 'Online-Nodes      / Clients / Sum:\n\n' ]
 
         for ffSeg in sorted(SegmentDict):
-            MeshCloudFile.write('Segment %02d: %5d / %5d / %5d / (%d)\n' % (ffSeg, SegmentDict[ffSeg]['Nodes'], SegmentDict[ffSeg]['Clients'], SegmentDict[ffSeg]['Nodes']+SegmentDict[ffSeg]['Clients'],SegmentDict[ffSeg]['BlindLoad']))
-            TotalNodes   += SegmentDict[ffSeg]['Nodes']
-            TotalClients += SegmentDict[ffSeg]['Clients']
-#            TotalUplinks += SegmentDict[ffSeg]['Uplinks']
-
+            SegStats = SegmentDict[ffSeg]
+            StatLines.append('Segment %02d: %5d / %5d / %5d / (%d)\n' % (ffSeg, SegStats['Nodes'], SegStats['Clients'], SegStats['Nodes']+SegStats['Clients'],SegStats['BlindLoad']))
 
-        MeshCloudFile.write('\n------------------------------------------------------------------------\n')
-        MeshCloudFile.write('Totals:     %5d / %5d / %5d\n' % (TotalNodes, TotalClients, TotalNodes+TotalClients))
+        TotalNodes   = sum(SegStats['Nodes'] for SegStats in SegmentDict.values())
+        TotalClients = sum(SegStats['Clients'] for SegStats in SegmentDict.values())
+#        TotalUplinks = sum(SegStats['Uplinks'] for SegStats in SegmentDict.values())
 
+        StatLines.append(TotalsSeparator)
+        StatLines.append('Totals:     %5d / %5d / %5d\n' % (TotalNodes, TotalClients, TotalNodes+TotalClients))
 
-        MeshCloudFile.write('\n\n########################################################################\n\n')
-        MeshCloudFile.write('Stress of Regions:\n\n')
 
-        TotalNodes   = 0
-        TotalClients = 0
+        StatLines.append(SectionSeparator)
+        StatLines.append('Stress of Regions:\n\n')
 
         for Region in sorted(RegionDict):
-            MeshCloudFile.write('%-32s: %4d + %4d = %4d  (Seg.%02d / old = %2d)\n' % (Region, RegionDict[Region]['Nodes'], RegionDict[Region]['Clients'], RegionDict[Region]['Nodes']+RegionDict[Region]['Clients'], RegionDict[Region]['Segment'], RegionDict[Region]['OldGluon']))
-            TotalNodes   += RegionDict[Region]['Nodes']
-            TotalClients += RegionDict[Region]['Clients']
+            RegionStats = RegionDict[Region]
+            StatLines.append('%-32s: %4d + %4d = %4d  (Seg.%02d / old = %2d)\n' % (Region, RegionStats['Nodes'], RegionStats['Clients'], RegionStats['Nodes']+RegionStats['Clients'], RegionStats['Segment'], RegionStats['OldGluon']))
 
-        MeshCloudFile.write('\n------------------------------------------------------------------------\n')
-        MeshCloudFile.write('Totals:     %5d / %5d / %5d\n' % (TotalNodes, TotalClients, TotalNodes+TotalClients))
+        TotalNodes   = sum(RegionStats['Nodes'] for RegionStats in RegionDict.values())
+        TotalClients = sum(RegionStats['Clients'] for RegionStats in RegionDict.values())
+
+        StatLines.append(TotalsSeparator)
+        StatLines.append('Totals:     %5d / %5d / %5d\n' % (TotalNodes, TotalClients, TotalNodes+TotalClients))
+
+        MeshCloudFile.writelines(StatLines)
         return
 
 
@@ -682,13 +822,17 @@ class ffMeshNet:
     #==============================================================================
     def WriteMeshCloudList(self,FileName):
 
-        print('Writing out Mesh Cloud List ...')
-        MeshCloudFile = open(FileName, mode='w')
+        try:
+            self.__log('Writing out Mesh Cloud List ...')
+            MeshCloudFile = open(FileName, mode='w', buffering=1<<20)
+
+            self.__WriteMeshClouds(MeshCloudFile)
+            self.__WriteSingleNodes(MeshCloudFile)
+            self.__WriteStatistics(MeshCloudFile)
 
-        self.__WriteMeshClouds(MeshCloudFile)
-        self.__WriteSingleNodes(MeshCloudFile)
-        self.__WriteStatistics(MeshCloudFile)
+            MeshCloudFile.close()
+            self.__log()
+        finally:
+            self.__FlushLog()
 
-        MeshCloudFile.close()
-        print()
         return
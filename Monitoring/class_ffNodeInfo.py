@@ -51,6 +51,7 @@ import datetime
 import calendar
 import json
 import re
+import sys
 import hashlib
 import zlib
 
@@ -98,6 +99,7 @@ ZipGridName    = 'ZipGrid.json'       # Grid of ZIP Codes from Baden-Wuerttember
 ffsIPv6Template        = re.compile('^fd21:b4dc:4b[0-9]{2}:0?:')
 
 GwMacTemplate          = re.compile('^02:00:(3[1-9]):[0-6][0-9](:[0-9]{2}){2}')
+GwMacPrefix            = '02:00:3'      # fast Pre-Check for GwMacTemplate
 GwIdTemplate           = re.compile('^0200(3[1-9])([0-9]{2}){3}')
 
 MacAdrTemplate         = re.compile('^([0-9a-f]{2}:){5}[0-9a-f]{2}$')
@@ -122,13 +124,15 @@ NODETYPE_DNS_SEGASSIGN = 3
 NODETYPE_MTU_1340      = 4
 NODETYPE_MCAST_ff05    = 5
 
-GLUON_MARKER           = [ '?', '%', '$', '$', '$', ' ' ]    # Marker for Gluon-Type in Lists
+GLUON_MARKER           = ( '?', '%', '$', '$', '$', ' ' )    # Marker for Gluon-Type in Lists
 
 NODESTATE_UNKNOWN      = '?'
 NODESTATE_OFFLINE      = '#'
 NODESTATE_ONLINE_MESH  = ' '
 NODESTATE_ONLINE_VPN   = 'V'
 
+NODESTATES_ONLINE      = frozenset([ NODESTATE_ONLINE_MESH, NODESTATE_ONLINE_VPN ])
+
 RESPONDD_PORT          = 1001
 RESPONDD_TIMEOUT       = 2.0
 
@@ -206,6 +210,7 @@ class ffNodeInfo:
             'Segment': None,
             'SegMode': 'auto',
             'KeyDir': '',
+            'KeySeg': None,
             'KeyFile': '',
             'FastdGW': None,
             'FastdKey': None,
@@ -379,7 +384,7 @@ class ffNodeInfo:
     def __IsOnline(self,ffNodeMAC):
 
         if ffNodeMAC in self.ffNodeDict:
-            OnlineState = self.ffNodeDict[ffNodeMAC]['Status'] in [ NODESTATE_ONLINE_MESH, NODESTATE_ONLINE_VPN ]
+            OnlineState = self.ffNodeDict[ffNodeMAC]['Status'] in NODESTATES_ONLINE
         else:
             OnlineState = False
 
@@ -744,7 +749,7 @@ class ffNodeInfo:
         BatmanList = []
 
         for IF_Tuple in InterfaceList:
-            if IF_Tuple[1][:3] == 'bat':
+            if IF_Tuple[1].startswith('bat'):
                 BatmanList.append(IF_Tuple[1])
 
         return BatmanList
@@ -1077,6 +1082,7 @@ class ffNodeInfo:
             if ffNodeMAC in self.ffNodeDict:
                 self.ffNodeDict[ffNodeMAC]['FastdKey'] = PeerKey
                 self.ffNodeDict[ffNodeMAC]['KeyDir']   = FastdKeyInfo['KeyDir']
+                self.ffNodeDict[ffNodeMAC]['KeySeg']   = FastdKeyInfo['PeerSeg']
                 self.ffNodeDict[ffNodeMAC]['KeyFile']  = FastdKeyInfo['KeyFile']
                 self.ffNodeDict[ffNodeMAC]['SegMode']  = FastdKeyInfo['SegMode']
                 addedInfos += 1
@@ -1181,14 +1187,14 @@ class ffNodeInfo:
                 if GpsRegion is not None:
                     self.ffNodeDict[ffNodeMAC]['Region']  = GpsRegion
 
-                if self.ffNodeDict[ffNodeMAC]['SegMode'][:3] == 'fix':        # fixed Segment independent of Location
+                if self.ffNodeDict[ffNodeMAC]['SegMode'].startswith('fix'):   # fixed Segment independent of Location
                     if self.ffNodeDict[ffNodeMAC]['SegMode'][4:].isnumeric():
                         self.ffNodeDict[ffNodeMAC]['HomeSeg'] = int(self.ffNodeDict[ffNodeMAC]['SegMode'][4:])
                     else:
-                        self.ffNodeDict[ffNodeMAC]['HomeSeg'] = int(self.ffNodeDict[ffNodeMAC]['KeyDir'][3:])
-                elif self.ffNodeDict[ffNodeMAC]['SegMode'][:3] == 'man':      # manually defined Segment
-                    self.ffNodeDict[ffNodeMAC]['HomeSeg'] = int(self.ffNodeDict[ffNodeMAC]['KeyDir'][3:])
-                elif self.ffNodeDict[ffNodeMAC]['SegMode'][:3] == 'mob':      # No specific Segment for mobile Nodes
+                        self.ffNodeDict[ffNodeMAC]['HomeSeg'] = self.ffNodeDict[ffNodeMAC]['KeySeg']
+                elif self.ffNodeDict[ffNodeMAC]['SegMode'].startswith('man'): # manually defined Segment
+                    self.ffNodeDict[ffNodeMAC]['HomeSeg'] = self.ffNodeDict[ffNodeMAC]['KeySeg']
+                elif self.ffNodeDict[ffNodeMAC]['SegMode'].startswith('mob'): # No specific Segment for mobile Nodes
                     self.ffNodeDict[ffNodeMAC]['HomeSeg'] = None
                 elif self.ffNodeDict[ffNodeMAC]['GluonType'] == NODETYPE_LEGACY:    # Firmware w/o Segment support
                     self.ffNodeDict[ffNodeMAC]['HomeSeg'] = 0
@@ -1209,75 +1215,84 @@ class ffNodeInfo:
 
         print('Checking Consistency of Data ...')
 
-        for ffNodeMAC in self.ffNodeDict.keys():
-            if self.ffNodeDict[ffNodeMAC]['Status'] != NODESTATE_UNKNOWN:
-
-                if self.ffNodeDict[ffNodeMAC]['Name'] is None:
-                    print('!! Hostname is None: %s %s' % (self.ffNodeDict[ffNodeMAC]['Status'],ffNodeMAC))
-                elif BadNameTemplate.match(self.ffNodeDict[ffNodeMAC]['Name']):
-                    print('!! Invalid ffNode Hostname: %s = %s -> \'%s\'' % (ffNodeMAC,self.ffNodeDict[ffNodeMAC]['Status'],self.ffNodeDict[ffNodeMAC]['Name']))
-
-                #----- Special TP-Link CPE Handling -----
-                if (self.ffNodeDict[ffNodeMAC]['Hardware'].lower().startswith('tp-link cpe') and
-                    (self.ffNodeDict[ffNodeMAC]['GluonType'] < NODETYPE_MTU_1340 or self.ffNodeDict[ffNodeMAC]['Firmware'][:14] < '1.4+2018-06-24')):
-                    print('++ Old CPE found: %s %s = \'%s\'' % (self.ffNodeDict[ffNodeMAC]['Status'],ffNodeMAC,self.ffNodeDict[ffNodeMAC]['Name']))
-                    self.ffNodeDict[ffNodeMAC]['HomeSeg'] = CPE_TEMP_SEGMENT
-                    self.ffNodeDict[ffNodeMAC]['SegMode'] = 'fix %02d' % (CPE_TEMP_SEGMENT)
-
-                if self.ffNodeDict[ffNodeMAC]['FastdGW'] is not None and self.ffNodeDict[ffNodeMAC]['FastdGW'] != '':   # Node has VPN-Connection to Gateway
-                    if self.ffNodeDict[ffNodeMAC]['KeyDir'] > 'vpn08' and self.ffNodeDict[ffNodeMAC]['GluonType'] < NODETYPE_DNS_SEGASSIGN:
-                        self.ffNodeDict[ffNodeMAC]['GluonType'] = NODETYPE_DNS_SEGASSIGN
-                        print('++ Node has Gluon with DNS-SegAssign: %s / %s = \'%s\'' % ( self.ffNodeDict[ffNodeMAC]['KeyDir'],ffNodeMAC,self.ffNodeDict[ffNodeMAC]['Name']))
-                    elif self.ffNodeDict[ffNodeMAC]['GluonType'] < NODETYPE_SEGMENT_LIST:
-                        self.ffNodeDict[ffNodeMAC]['GluonType'] = NODETYPE_SEGMENT_LIST
-                        print('++ Node has newer Gluon as expected: %s / %s = \'%s\'' % ( self.ffNodeDict[ffNodeMAC]['KeyDir'],ffNodeMAC,self.ffNodeDict[ffNodeMAC]['Name']))
-
-                    if self.ffNodeDict[ffNodeMAC]['Status'] != NODESTATE_ONLINE_VPN:
-                        self.ffNodeDict[ffNodeMAC]['Status'] = NODESTATE_ONLINE_VPN
-                        print('++ Node has active VPN-Connection: %s / %s = \'%s\'' % (self.ffNodeDict[ffNodeMAC]['KeyDir'],ffNodeMAC,self.ffNodeDict[ffNodeMAC]['Name']))
-
-                if self.ffNodeDict[ffNodeMAC]['Status'] == NODESTATE_ONLINE_VPN:
-                    if self.ffNodeDict[ffNodeMAC]['KeyDir'] == '':
-                        print('!! Uplink w/o Key: %s %s = \'%s\'' % (self.ffNodeDict[ffNodeMAC]['Status'],ffNodeMAC,self.ffNodeDict[ffNodeMAC]['Name']))
-                        self.ffNodeDict[ffNodeMAC]['Status'] = NODESTATE_ONLINE_MESH
-                    elif self.ffNodeDict[ffNodeMAC]['Segment'] is None:
-                        print('!! Segment is None: %s = \'%s\'' % (ffNodeMAC,self.ffNodeDict[ffNodeMAC]['Name']))
-                        self.ffNodeDict[ffNodeMAC]['Segment'] = int(self.ffNodeDict[ffNodeMAC]['KeyDir'][3:])
-                    elif self.ffNodeDict[ffNodeMAC]['Segment'] != int(self.ffNodeDict[ffNodeMAC]['KeyDir'][3:]):
-                        print('!! Segment <> KeyDir: %s = \'%s\': Seg.%02d <> %s' % (
-                            ffNodeMAC,self.ffNodeDict[ffNodeMAC]['Name'],self.ffNodeDict[ffNodeMAC]['Segment'],self.ffNodeDict[ffNodeMAC]['KeyDir']))
-                        self.ffNodeDict[ffNodeMAC]['Segment'] = int(self.ffNodeDict[ffNodeMAC]['KeyDir'][3:])
-                else:
-                    for NeighbourMAC in self.ffNodeDict[ffNodeMAC]['Neighbours']:
-                        if GwMacTemplate.match(NeighbourMAC):
-                            print('!! GW-Connection w/o Uplink: %s %s = \'%s\'' % (self.ffNodeDict[ffNodeMAC]['Status'],ffNodeMAC,self.ffNodeDict[ffNodeMAC]['Name']))
-
-                if self.ffNodeDict[ffNodeMAC]['HomeSeg'] is not None:
-                    if (self.ffNodeDict[ffNodeMAC]['KeyDir'] != ''
-                    and self.ffNodeDict[ffNodeMAC]['HomeSeg'] != int(self.ffNodeDict[ffNodeMAC]['KeyDir'][3:])
-                    and self.ffNodeDict[ffNodeMAC]['SegMode'] == 'auto'):
-                        print('++ Wrong Segment:   %s %s = \'%s\': %02d -> %02d %s' % (
-                            self.ffNodeDict[ffNodeMAC]['Status'],ffNodeMAC,self.ffNodeDict[ffNodeMAC]['Name'],int(self.ffNodeDict[ffNodeMAC]['KeyDir'][3:]),
-                            self.ffNodeDict[ffNodeMAC]['HomeSeg'],self.ffNodeDict[ffNodeMAC]['SegMode']))
-
-                    if self.ffNodeDict[ffNodeMAC]['HomeSeg'] > 8 and self.ffNodeDict[ffNodeMAC]['GluonType'] < NODETYPE_DNS_SEGASSIGN:
-                        print('!! Invalid Segment for Gluon-Type %d: >%s< %s = \'%s\' -> Seg. %02d' % (
-                            self.ffNodeDict[ffNodeMAC]['GluonType'],self.ffNodeDict[ffNodeMAC]['Status'],ffNodeMAC,self.ffNodeDict[ffNodeMAC]['Name'],
-                            self.ffNodeDict[ffNodeMAC]['HomeSeg']))
-                    elif self.ffNodeDict[ffNodeMAC]['HomeSeg'] == 0:
-                        print('!! Legacy Node found: %s %s = \'%s\'' % (self.ffNodeDict[ffNodeMAC]['Status'],ffNodeMAC,self.ffNodeDict[ffNodeMAC]['Name']))
-                        self.ffNodeDict[ffNodeMAC]['Status'] = NODESTATE_UNKNOWN    # ignore this Node Data
-
-                if self.__IsOnline(ffNodeMAC):
-                    if self.ffNodeDict[ffNodeMAC]['Segment'] is None:
-                        print('!! Segment is None: %s %s = \'%s\'' % (self.ffNodeDict[ffNodeMAC]['Status'],ffNodeMAC,self.ffNodeDict[ffNodeMAC]['Name']))
-                        self.ffNodeDict[ffNodeMAC]['Status'] = NODESTATE_UNKNOWN    # ignore this Node Data
+        ValidSegmentSet = set(ValidSegmentList)
+        MessageList     = []    # Console Messages, written out at End
 
-                    elif self.ffNodeDict[ffNodeMAC]['Segment'] not in ValidSegmentList:
-                        print('>>> Unknown Segment:   %s %s = \'%s\' in Seg.%02d' % (self.ffNodeDict[ffNodeMAC]['Status'],ffNodeMAC,self.ffNodeDict[ffNodeMAC]['Segment']))
-                        self.ffNodeDict[ffNodeMAC]['Status'] = NODESTATE_UNKNOWN    # ignore this Node Data
+        try:
+            for ffNodeMAC, ffNode in self.ffNodeDict.items():
+                if ffNode['Status'] != NODESTATE_UNKNOWN:
+
+                    if ffNode['Name'] is None:
+                        MessageList.append('!! Hostname is None: %s %s' % (ffNode['Status'],ffNodeMAC))
+                    elif BadNameTemplate.match(ffNode['Name']):
+                        MessageList.append('!! Invalid ffNode Hostname: %s = %s -> \'%s\'' % (ffNodeMAC,ffNode['Status'],ffNode['Name']))
+
+                    #----- Special TP-Link CPE Handling -----
+                    if (ffNode['Hardware'].lower().startswith('tp-link cpe') and
+                        (ffNode['GluonType'] < NODETYPE_MTU_1340 or ffNode['Firmware'][:14] < '1.4+2018-06-24')):
+                        MessageList.append('++ Old CPE found: %s %s = \'%s\'' % (ffNode['Status'],ffNodeMAC,ffNode['Name']))
+                        ffNode['HomeSeg'] = CPE_TEMP_SEGMENT
+                        ffNode['SegMode'] = 'fix %02d' % (CPE_TEMP_SEGMENT)
+
+                    if ffNode['FastdGW'] is not None and ffNode['FastdGW'] != '':   # Node has VPN-Connection to Gateway
+                        if ffNode['KeyDir'] > 'vpn08' and ffNode['GluonType'] < NODETYPE_DNS_SEGASSIGN:
+                            ffNode['GluonType'] = NODETYPE_DNS_SEGASSIGN
+                            MessageList.append('++ Node has Gluon with DNS-SegAssign: %s / %s = \'%s\'' % ( ffNode['KeyDir'],ffNodeMAC,ffNode['Name']))
+                        elif ffNode['GluonType'] < NODETYPE_SEGMENT_LIST:
+                            ffNode['GluonType'] = NODETYPE_SEGMENT_LIST
+                            MessageList.append('++ Node has newer Gluon as expected: %s / %s = \'%s\'' % ( ffNode['KeyDir'],ffNodeMAC,ffNode['Name']))
+
+                        if ffNode['Status'] != NODESTATE_ONLINE_VPN:
+                            ffNode['Status'] = NODESTATE_ONLINE_VPN
+                            MessageList.append('++ Node has active VPN-Connection: %s / %s = \'%s\'' % (ffNode['KeyDir'],ffNodeMAC,ffNode['Name']))
+
+                    if ffNode['Status'] == NODESTATE_ONLINE_VPN:
+                        if ffNode['KeyDir'] == '':
+                            MessageList.append('!! Uplink w/o Key: %s %s = \'%s\'' % (ffNode['Status'],ffNodeMAC,ffNode['Name']))
+                            ffNode['Status'] = NODESTATE_ONLINE_MESH
+                        elif ffNode['Segment'] is None:
+                            MessageList.append('!! Segment is None: %s = \'%s\'' % (ffNodeMAC,ffNode['Name']))
+                            ffNode['Segment'] = ffNode['KeySeg']
+                        elif ffNode['Segment'] != ffNode['KeySeg']:
+                            MessageList.append('!! Segment <> KeyDir: %s = \'%s\': Seg.%02d <> %s' % (
+                                ffNodeMAC,ffNode['Name'],ffNode['Segment'],ffNode['KeyDir']))
+                            ffNode['Segment'] = ffNode['KeySeg']
+                    else:
+                        for NeighbourMAC in ffNode['Neighbours']:
+                            if NeighbourMAC.startswith(GwMacPrefix) and GwMacTemplate.match(NeighbourMAC):
+                                MessageList.append('!! GW-Connection w/o Uplink: %s %s = \'%s\'' % (ffNode['Status'],ffNodeMAC,ffNode['Name']))
+
+                    if ffNode['HomeSeg'] is not None:
+                        if (ffNode['KeyDir'] != ''
+                        and ffNode['HomeSeg'] != ffNode['KeySeg']
+                        and ffNode['SegMode'] == 'auto'):
+                            MessageList.append('++ Wrong Segment:   %s %s = \'%s\': %02d -> %02d %s' % (
+                                ffNode['Status'],ffNodeMAC,ffNode['Name'],ffNode['KeySeg'],
+                                ffNode['HomeSeg'],ffNode['SegMode']))
+
+                        if ffNode['HomeSeg'] > 8 and ffNode['GluonType'] < NODETYPE_DNS_SEGASSIGN:
+                            MessageList.append('!! Invalid Segment for Gluon-Type %d: >%s< %s = \'%s\' -> Seg. %02d' % (
+                                ffNode['GluonType'],ffNode['Status'],ffNodeMAC,ffNode['Name'],
+                                ffNode['HomeSeg']))
+                        elif ffNode['HomeSeg'] == 0:
+                            MessageList.append('!! Legacy Node found: %s %s = \'%s\'' % (ffNode['Status'],ffNodeMAC,ffNode['Name']))
+                            ffNode['Status'] = NODESTATE_UNKNOWN    # ignore this Node Data
+
+                    if self.__IsOnline(ffNodeMAC):
+                        if ffNode['Segment'] is None:
+                            MessageList.append('!! Segment is None: %s %s = \'%s\'' % (ffNode['Status'],ffNodeMAC,ffNode['Name']))
+                            ffNode['Status'] = NODESTATE_UNKNOWN    # ignore this Node Data
+
+                        elif ffNode['Segment'] not in ValidSegmentSet:
+                            MessageList.append('>>> Unknown Segment:   %s %s = \'%s\' in Seg.%02d' % (ffNode['Status'],ffNodeMAC,ffNode['Name'],ffNode['Segment']))
+                            ffNode['Status'] = NODESTATE_UNKNOWN    # ignore this Node Data
+
+            MessageList.append('... done.\n')
+        finally:
+            if len(MessageList) > 0:
+                sys.stdout.write('\n'.join(MessageList) + '\n')
+                sys.stdout.flush()
 
-        print('... done.\n')
         return
 
 